@@ -0,0 +1,116 @@
+"""
+Genera la versión de producción del frontend en frontend/dist:
+- CSS/JS con hash de contenido en el nombre (cache inmutable)
+- HTML reescrito para apuntar a esos nombres y usar la API del mismo origen
+- variantes precomprimidas .gz (y .br si está instalado `brotli`)
+
+Uso: python build_frontend.py
+"""
+import os
+import re
+import json
+import gzip
+import shutil
+import hashlib
+
+try:
+    import brotli  # Opcional: pip install brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRONTEND_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "frontend"))
+DIST_DIR = os.path.join(FRONTEND_DIR, "dist")
+MANIFEST_NAME = "manifest.json"
+
+# Archivos que se sirven con nombre versionado
+FINGERPRINT_EXTENSIONS = (".css", ".js")
+COMPRESS_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg")
+
+# En producción el frontend se sirve desde la misma API
+API_BASE_SNIPPET = "<script>window.API_BASE_URL = window.location.origin;</script>"
+
+def _fingerprint(rel_path: str, content: bytes) -> str:
+    root, ext = os.path.splitext(rel_path)
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    return f"{root}.{digest}{ext}"
+
+def _write_variants(path: str, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+    if not path.endswith(COMPRESS_EXTENSIONS):
+        return
+    # mtime=0 para que el .gz sea reproducible entre builds
+    gz = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gz) < len(content):
+        with open(path + ".gz", "wb") as f:
+            f.write(gz)
+    if brotli is not None:
+        br = brotli.compress(content, quality=11)
+        if len(br) < len(content):
+            with open(path + ".br", "wb") as f:
+                f.write(br)
+
+def _iter_source_files():
+    for root, dirs, files in os.walk(FRONTEND_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        for name in files:
+            full = os.path.join(root, name)
+            yield os.path.relpath(full, FRONTEND_DIR).replace(os.sep, "/"), full
+
+def frontend_is_stale() -> bool:
+    """True si no hay build o si algún archivo fuente es más reciente que el manifiesto."""
+    manifest_path = os.path.join(DIST_DIR, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return True
+    built_at = os.path.getmtime(manifest_path)
+    for root, dirs, files in os.walk(FRONTEND_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        # El mtime de la carpeta cambia también al borrar o renombrar archivos
+        if os.path.getmtime(root) > built_at:
+            return True
+        if any(os.path.getmtime(os.path.join(root, name)) > built_at for name in files):
+            return True
+    return False
+
+def build_frontend() -> dict:
+    """Reconstruye frontend/dist y devuelve el manifiesto {original: versionado}."""
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR, exist_ok=True)
+
+    manifest = {}
+    html_files = []
+    for rel_path, full in _iter_source_files():
+        if rel_path.endswith(".html"):
+            html_files.append((rel_path, full))
+            continue
+        with open(full, "rb") as f:
+            content = f.read()
+        out_rel = _fingerprint(rel_path, content) if rel_path.endswith(FINGERPRINT_EXTENSIONS) else rel_path
+        out_path = os.path.join(DIST_DIR, out_rel)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        _write_variants(out_path, content)
+        if out_rel != rel_path:
+            manifest[rel_path] = out_rel
+
+    def _rewrite(match):
+        attr, url = match.group(1), match.group(2)
+        return f'{attr}="{manifest.get(url, url)}"'
+
+    for rel_path, full in html_files:
+        with open(full, "r", encoding="utf-8") as f:
+            html = f.read()
+        html = re.sub(r'\b(href|src)="([^"]+)"', _rewrite, html)
+        html = html.replace("</head>", f"    {API_BASE_SNIPPET}\n</head>", 1)
+        out_path = os.path.join(DIST_DIR, rel_path)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        _write_variants(out_path, html.encode("utf-8"))
+
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+if __name__ == "__main__":
+    result = build_frontend()
+    print(f"Frontend generado en {DIST_DIR} ({len(result)} archivos versionados, brotli={'sí' if brotli else 'no'})")
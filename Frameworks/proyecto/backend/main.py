@@ -1,15 +1,32 @@
 from fastapi import FastAPI, HTTPException, Query, Header, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, EmailStr
-from typing import Dict, Optional, List, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import GZipResponder
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.datastructures import Headers
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import Dict, Optional, List, Any, Tuple
 import os
 import json
 import secrets
 import hashlib
 import base64
 import hmac
+import math
+import time
 import shutil
+import tempfile
 import uuid
+import asyncio
+import csv
+import gzip
+import mimetypes
+import io
+import re
+import unicodedata
+import zlib
+from collections import deque
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 # Cargar variables
@@ -59,6 +76,74 @@ app.add_middleware(
 
 print(f"CORS allow_origins={allow_origins}, allow_credentials={allow_credentials_flag}")
 
+# Modo producción: la API sirve el frontend compilado y comprime respuestas grandes
+serve_frontend_env = os.getenv("SERVE_FRONTEND", "false").lower()
+SERVE_FRONTEND = serve_frontend_env in ("1", "true", "yes", "y")
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Interpreta Accept-Encoding ("gzip;q=0.5, br") -> {codificación: q}."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+def _encoding_allowed(accepted: Dict[str, float], encoding: str) -> bool:
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+# Tipos que ya vienen comprimidos: volver a pasarlos por gzip solo gasta CPU
+COMPRESSED_MEDIA_TYPES = ("application/gzip", "application/x-gzip", "application/zip", "font/woff", "font/woff2")
+COMPRESSED_MEDIA_PREFIXES = ("image/", "audio/", "video/")
+
+def _is_compressed_media(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "image/svg+xml":  # SVG es texto y sí se comprime bien
+        return False
+    return media_type in COMPRESSED_MEDIA_TYPES or media_type.startswith(COMPRESSED_MEDIA_PREFIXES)
+
+class _SkipCompressedGZipResponder(GZipResponder):
+    """Deja pasar sin tocar las respuestas cuyo Content-Type ya está comprimido."""
+
+    async def send_with_gzip(self, message):
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            if _is_compressed_media(Headers(raw=message["headers"]).get("content-type", "")):
+                # Mismo camino que cuando la respuesta ya trae Content-Encoding
+                self.content_encoding_set = True
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZip excepto en streams que deben enviarse al instante (SSE), si el cliente
+    lo rechaza (q=0) o si el contenido ya está comprimido (snapshots, imágenes).
+    """
+    excluded_paths = ("/events/",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            if scope.get("path") in self.excluded_paths or not _encoding_allowed(_accepted_encodings(accept_encoding), "gzip"):
+                await self.app(scope, receive, send)
+                return
+            responder = _SkipCompressedGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+if SERVE_FRONTEND:
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 # ============================================================================
 # MODELOS DE DATOS (usando Pydantic)
 # ============================================================================
@@ -112,6 +197,8 @@ email_index: Dict[str, str] = {}  # Email -> user_id
 username_index: Dict[str, str] = {}  # Username -> user_id
 sessions: Dict[str, str] = {}  # Token -> user_id
 products_db: Dict[int, ProductResponse] = {}
+# Clases tal como están en DumpData, por (user_id, item_id); es la fuente de los respaldos
+persisted_classes: Dict[Tuple[str, int], Dict] = {}
 
 # ============================================================================
 # FUNCIONES DE HASH Y AUTENTICACIÓN
@@ -197,6 +284,448 @@ def get_user_by_token(token: str) -> Optional[Dict]:
         return None
     return users_store.get(user_id)
 
+# ============================================================================
+# ANALÍTICA: ROLLUPS MATERIALIZADOS
+# ============================================================================
+
+# Orden de los parciales usado para calcular tendencias
+PERIOD_ORDER = ["primero", "segundo", "tercero"]
+PERCENTILES = [25, 50, 75, 90]
+
+HISTOGRAM_BUCKETS = 100  # Tramos de 1% respecto a max_score
+# Valores fuera de este rango se ignoran: así las sumas nunca llegan a inf/nan
+MAX_NUMERIC_VALUE = 1e9
+
+class_rollups: Dict[int, Dict] = {}  # item_id -> estadísticas precalculadas de la clase
+owner_classes_index: Dict[str, set] = {}  # Username -> item_ids
+user_rollups: Dict[str, Dict] = {}  # Username -> suma de los rollups de sus clases
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    """Convierte a float; "nan", "inf" o valores desmedidos se tratan como ausentes."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(number) or abs(number) > MAX_NUMERIC_VALUE:
+        return default
+    return number
+
+def _iter_activities(partial: Dict):
+    """(índice, actividad) de un parcial, ignorando valores que no sean dicts."""
+    activities = partial.get("activities")
+    if not isinstance(activities, list):
+        return
+    for idx, activity in enumerate(activities):
+        if isinstance(activity, dict):
+            yield idx, activity
+
+def _histogram_percentile(histogram: List[int], pct: float) -> Optional[float]:
+    """Percentil (en % de max_score) interpolado dentro del tramo del histograma."""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = total * pct / 100.0
+    cumulative = 0
+    for i, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            return round((i + (target - cumulative) / count) * 100.0 / len(histogram), 2)
+        cumulative += count
+    return 100.0
+
+def _trend(values_by_period: Dict[str, Optional[float]]) -> List[Dict]:
+    """Compara parciales consecutivos (primero -> segundo -> tercero)."""
+    present = [(name, values_by_period[name]) for name in PERIOD_ORDER if values_by_period.get(name) is not None]
+    trend = []
+    for (prev_name, prev), (cur_name, cur) in zip(present, present[1:]):
+        difference = cur - prev
+        trend.append({
+            "from": prev_name,
+            "to": cur_name,
+            "previous": round(prev, 2),
+            "current": round(cur, 2),
+            "difference": round(difference, 2),
+            "trend": "mejora" if difference > 0 else "baja" if difference < 0 else "estable"
+        })
+    return trend
+
+def _empty_category_stats() -> Dict:
+    return {
+        "count": 0,
+        "sum": 0.0,
+        "weighted_sum": 0.0,
+        "weight": 0.0,
+        "histogram": [0] * HISTOGRAM_BUCKETS
+    }
+
+def _summarize_categories(categories: Dict[str, Dict]) -> Dict[str, Dict]:
+    summary = {}
+    step = HISTOGRAM_BUCKETS // 10
+    for name, stats in categories.items():
+        histogram = stats["histogram"]
+        summary[name] = {
+            "count": stats["count"],
+            "average": round(stats["sum"] / stats["count"], 2) if stats["count"] else None,
+            "weighted_average": round(stats["weighted_sum"] / stats["weight"], 2) if stats["weight"] else None,
+            # Percentiles y distribución en % respecto a max_score del parcial
+            "percentiles": {f"p{p}": _histogram_percentile(histogram, p) for p in PERCENTILES},
+            "distribution": [sum(histogram[i:i + step]) for i in range(0, HISTOGRAM_BUCKETS, step)]
+        }
+    return summary
+
+def _compute_class_rollup(product: "ProductResponse") -> Dict:
+    categories: Dict[str, Dict] = {}
+    vpf_by_period: Dict[str, float] = {}
+    vpf_values = []
+    activities_count = 0
+
+    for partial in product.partials or []:
+        pname = str(partial.get("name") or "")
+        vpf = _to_float(partial.get("vpf"))
+        vpf_values.append(vpf)
+        if pname.lower() in PERIOD_ORDER:
+            vpf_by_period[pname.lower()] = vpf
+
+        max_score = _to_float(partial.get("max_score"), 100.0) or 100.0
+        for _, activity in _iter_activities(partial):
+            score = _to_float(activity.get("score"))
+            weight = _to_float(activity.get("weight"), 1.0)
+            stats = categories.setdefault(str(activity.get("category") or "sin_categoria"), _empty_category_stats())
+            stats["count"] += 1
+            stats["sum"] += score
+            stats["weighted_sum"] += score * weight
+            stats["weight"] += weight
+            percent = max(0.0, min(score / max_score * 100.0, 99.999))
+            stats["histogram"][int(percent * HISTOGRAM_BUCKETS / 100.0)] += 1
+            activities_count += 1
+
+    return {
+        "item_id": product.item_id,
+        "name": product.name,
+        "owner": product.owner,
+        "partials_count": len(product.partials or []),
+        "activities_count": activities_count,
+        "vpf_sum": sum(vpf_values),
+        "vpf_count": len(vpf_values),
+        "vpf_by_period": vpf_by_period,
+        "categories": categories
+    }
+
+def _class_rollup_response(rollup: Dict) -> Dict:
+    return {
+        "item_id": rollup["item_id"],
+        "name": rollup["name"],
+        "partials_count": rollup["partials_count"],
+        "activities_count": rollup["activities_count"],
+        "vpf_average": round(rollup["vpf_sum"] / rollup["vpf_count"], 2) if rollup["vpf_count"] else None,
+        "vpf_by_period": rollup["vpf_by_period"],
+        "trend": _trend(rollup["vpf_by_period"]),
+        "categories": _summarize_categories(rollup["categories"])
+    }
+
+def _apply_to_user_rollup(owner: str, rollup: Dict, sign: int):
+    """Suma (sign=1) o resta (sign=-1) el rollup de una clase al agregado del dueño."""
+    total = user_rollups.setdefault(owner, {
+        "classes_count": 0,
+        "activities_count": 0,
+        "vpf_sum": 0.0,
+        "vpf_count": 0,
+        "periods": {},  # periodo -> [suma_vpf, clases]
+        "categories": {}
+    })
+    total["classes_count"] += sign
+    total["activities_count"] += sign * rollup["activities_count"]
+    total["vpf_sum"] += sign * rollup["vpf_sum"]
+    total["vpf_count"] += sign * rollup["vpf_count"]
+    for period, vpf in rollup["vpf_by_period"].items():
+        acc = total["periods"].setdefault(period, [0.0, 0])
+        acc[0] += sign * vpf
+        acc[1] += sign
+        if acc[1] <= 0:
+            del total["periods"][period]
+    for name, stats in rollup["categories"].items():
+        acc = total["categories"].setdefault(name, _empty_category_stats())
+        for key in ("count", "sum", "weighted_sum", "weight"):
+            acc[key] += sign * stats[key]
+        acc["histogram"] = [a + sign * b for a, b in zip(acc["histogram"], stats["histogram"])]
+        if acc["count"] <= 0:
+            del total["categories"][name]
+    if total["classes_count"] <= 0:
+        del user_rollups[owner]
+
+def get_user_rollup(owner: str) -> Dict:
+    total = user_rollups.get(owner)
+    if not total:
+        return {
+            "owner": owner, "classes_count": 0, "activities_count": 0, "vpf_average": None,
+            "vpf_by_period": {}, "trend": [], "categories": {}
+        }
+    vpf_by_period = {p: acc[0] / acc[1] for p, acc in total["periods"].items()}
+    return {
+        "owner": owner,
+        "classes_count": total["classes_count"],
+        "activities_count": total["activities_count"],
+        "vpf_average": round(total["vpf_sum"] / total["vpf_count"], 2) if total["vpf_count"] else None,
+        "vpf_by_period": {p: round(v, 2) for p, v in vpf_by_period.items()},
+        "trend": _trend(vpf_by_period),
+        "categories": _summarize_categories(total["categories"])
+    }
+
+def drop_class_rollup(item_id: int):
+    """Elimina el rollup de una clase y lo resta del agregado de su dueño."""
+    old = class_rollups.pop(item_id, None)
+    if old:
+        owner_classes_index.get(old["owner"], set()).discard(item_id)
+        _apply_to_user_rollup(old["owner"], old, -1)
+
+def refresh_class_rollup(item_id: int):
+    """Recalcula el rollup de una clase tras una mutación."""
+    drop_class_rollup(item_id)
+    product = products_db.get(item_id)
+    if product is None:
+        return
+    try:
+        rollup = _compute_class_rollup(product)
+    except Exception as e:
+        # Un dato inesperado no debe tumbar la API ni el arranque
+        print(f"Advertencia: no se pudo calcular el rollup de la clase {item_id}: {e}")
+        return
+    class_rollups[item_id] = rollup
+    owner_classes_index.setdefault(product.owner, set()).add(item_id)
+    _apply_to_user_rollup(product.owner, rollup, 1)
+
+def rebuild_all_rollups():
+    class_rollups.clear()
+    owner_classes_index.clear()
+    user_rollups.clear()
+    for item_id in list(products_db.keys()):
+        refresh_class_rollup(item_id)
+
+# ============================================================================
+# BÚSQUEDA: ÍNDICE INVERTIDO POR USUARIO
+# ============================================================================
+
+# Username -> prefijo normalizado -> entradas; una entrada es
+# (tipo, item_id, nombre_parcial, id_actividad)
+search_index: Dict[str, Dict[str, set]] = {}
+# item_id -> (owner, {entrada: (nombre, prefijos, palabras_largas)}) para
+# reindexar solo lo que cambió y poder desindexar una clase
+search_entries_by_class: Dict[int, tuple] = {}
+
+# Solo se indexan prefijos de hasta esta longitud; los términos más largos se
+# buscan por su prefijo recortado y se filtran con las palabras completas
+MAX_PREFIX_LENGTH = 20
+
+def _normalize_text(text: str) -> str:
+    """Minúsculas y sin acentos ("Cálculo" -> "calculo")."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def _tokenize(text: str) -> List[str]:
+    return [t for t in re.split(r"[^0-9a-z]+", _normalize_text(text)) if t]
+
+def _name_terms(text: str) -> Tuple[set, frozenset]:
+    """Prefijos (acotados) de cada palabra y las palabras más largas que el límite."""
+    tokens = _tokenize(text)
+    prefixes = {token[:i] for token in tokens for i in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1)}
+    return prefixes, frozenset(t for t in tokens if len(t) > MAX_PREFIX_LENGTH)
+
+def _class_search_entries(product: "ProductResponse") -> Dict[tuple, Any]:
+    """Entrada -> nombre indexable de la clase, sus parciales y actividades."""
+    entries = {("class", product.item_id, None, None): product.name}
+
+    def _add(entry: tuple, name: Any):
+        # Parciales con el mismo nombre comparten entrada: se indexan ambos nombres
+        entries[entry] = f"{entries[entry] or ''} {name or ''}" if entry in entries else name
+
+    for partial in product.partials or []:
+        pname = partial.get("name")
+        if not isinstance(pname, str):
+            continue
+        _add(("partial", product.item_id, pname, None), pname)
+        for idx, activity in _iter_activities(partial):
+            _add(("activity", product.item_id, pname, idx), activity.get("name"))
+    return entries
+
+def _unindex_entry(owner_index: Dict[str, set], entry: tuple, prefixes: set):
+    for prefix in prefixes:
+        bucket = owner_index.get(prefix)
+        if bucket is None:
+            continue
+        bucket.discard(entry)
+        if not bucket:
+            del owner_index[prefix]
+
+def drop_class_search(item_id: int):
+    old = search_entries_by_class.pop(item_id, None)
+    if not old:
+        return
+    owner, entries = old
+    owner_index = search_index.get(owner, {})
+    for entry, (_, prefixes, _) in entries.items():
+        _unindex_entry(owner_index, entry, prefixes)
+
+def refresh_class_search(item_id: int):
+    """Reindexa solo los nombres de la clase que cambiaron."""
+    product = products_db.get(item_id)
+    if product is None:
+        drop_class_search(item_id)
+        return
+    old = search_entries_by_class.get(item_id)
+    if old and old[0] != product.owner:
+        drop_class_search(item_id)
+        old = None
+    try:
+        names = _class_search_entries(product)
+    except Exception as e:
+        print(f"Advertencia: no se pudo indexar la clase {item_id}: {e}")
+        drop_class_search(item_id)
+        return
+    old_entries = old[1] if old else {}
+    owner_index = search_index.setdefault(product.owner, {})
+    entries = {}
+    for entry, name in names.items():
+        previous = old_entries.get(entry)
+        if previous is not None and previous[0] == name:
+            entries[entry] = previous
+            continue
+        if previous is not None:
+            _unindex_entry(owner_index, entry, previous[1])
+        prefixes, long_tokens = _name_terms(name)
+        for prefix in prefixes:
+            owner_index.setdefault(prefix, set()).add(entry)
+        entries[entry] = (name, prefixes, long_tokens)
+    for entry, previous in old_entries.items():
+        if entry not in names:
+            _unindex_entry(owner_index, entry, previous[1])
+    search_entries_by_class[item_id] = (product.owner, entries)
+
+def rebuild_search_index():
+    search_index.clear()
+    search_entries_by_class.clear()
+    for item_id in list(products_db.keys()):
+        refresh_class_search(item_id)
+
+def _entry_long_tokens(entry: tuple) -> frozenset:
+    indexed = search_entries_by_class.get(entry[1])
+    data = indexed[1].get(entry) if indexed else None
+    return data[2] if data else frozenset()
+
+def search_owner(owner: str, query: str) -> set:
+    """Entradas cuyo nombre contiene palabras que empiezan por cada término."""
+    owner_index = search_index.get(owner, {})
+    terms = _tokenize(query)
+    buckets = [owner_index.get(term[:MAX_PREFIX_LENGTH], set()) for term in terms]
+    if not buckets:
+        return set()
+    buckets.sort(key=len)
+    results = set(buckets[0]).intersection(*buckets[1:])
+    long_terms = [t for t in terms if len(t) > MAX_PREFIX_LENGTH]
+    if long_terms:
+        results = {
+            entry for entry in results
+            if all(any(token.startswith(term) for token in _entry_long_tokens(entry)) for term in long_terms)
+        }
+    return results
+
+# ============================================================================
+# ÍNDICES DERIVADOS
+# ============================================================================
+
+def refresh_class_indexes(item_id: int):
+    """Actualiza rollups e índice de búsqueda tras mutar una clase."""
+    refresh_class_rollup(item_id)
+    refresh_class_search(item_id)
+
+def drop_class_indexes(item_id: int):
+    drop_class_rollup(item_id)
+    drop_class_search(item_id)
+
+def rebuild_all_indexes():
+    rebuild_all_rollups()
+    rebuild_search_index()
+
+# ============================================================================
+# FEED DE CAMBIOS (SERVER-SENT EVENTS)
+# ============================================================================
+
+EVENTS_HISTORY_SIZE = 256  # Eventos recientes por usuario para reconexiones
+EVENTS_QUEUE_SIZE = 256  # Eventos pendientes por conexión antes de pedir resync
+EVENTS_HEARTBEAT_SECONDS = 15.0
+# Los ids de evento son "<epoch>-<secuencia>": el epoch cambia en cada arranque,
+# así un Last-Event-ID de un proceso anterior siempre provoca un resync
+EVENTS_EPOCH = secrets.token_hex(4)
+# EventSource no admite cabeceras: el navegador abre el feed con un ticket de un
+# solo uso y vida corta en vez de poner el token de sesión en la URL
+EVENTS_TICKET_SECONDS = 30.0
+
+class_versions: Dict[int, int] = {}  # item_id -> versión de la clase
+event_sequences: Dict[str, int] = {}  # Username -> última secuencia de evento
+event_history: Dict[str, deque] = {}  # Username -> eventos recientes
+event_subscribers: Dict[str, set] = {}  # Username -> colas de conexiones abiertas
+event_tickets: Dict[str, Tuple[str, float]] = {}  # Ticket -> (token de sesión, expiración)
+
+def _push_event(queue: asyncio.Queue, event: Dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Cliente demasiado lento: descartar lo pendiente y pedir resincronización
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({"id": event["id"], "type": "resync"})
+
+def _current_event_id(owner: str) -> str:
+    return f"{EVENTS_EPOCH}-{event_sequences.get(owner, 0)}"
+
+def publish_change(owner: str, event_type: str, item_id: int, **payload) -> Dict:
+    """Registra un cambio de clase y lo envía a las conexiones del dueño."""
+    class_versions[item_id] = class_versions.get(item_id, 0) + 1
+    event_sequences[owner] = event_sequences.get(owner, 0) + 1
+    event = {
+        "id": _current_event_id(owner),
+        "seq": event_sequences[owner],
+        "type": event_type,
+        "item_id": item_id,
+        "version": class_versions[item_id],
+        **payload
+    }
+    event_history.setdefault(owner, deque(maxlen=EVENTS_HISTORY_SIZE)).append(event)
+    for queue in event_subscribers.get(owner, set()):
+        _push_event(queue, event)
+    return event
+
+def events_since(owner: str, last_event_id: str) -> List[Dict]:
+    """
+    Eventos posteriores a `last_event_id`. Pide resync si el id es de otro
+    arranque, está fuera del historial o no se puede interpretar.
+    """
+    resync = [{"id": _current_event_id(owner), "type": "resync"}]
+    epoch, _, seq_text = last_event_id.partition("-")
+    history = event_history.get(owner)
+    if epoch != EVENTS_EPOCH or not seq_text.isdigit() or not history:
+        return resync
+    seq = int(seq_text)
+    if seq > history[-1]["seq"] or seq < history[0]["seq"] - 1:
+        return resync
+    return [e for e in history if e["seq"] > seq]
+
+def issue_event_ticket(session_token: str) -> str:
+    now = time.monotonic()
+    for ticket in [t for t, (_, expires) in event_tickets.items() if expires <= now]:
+        del event_tickets[ticket]
+    ticket = secrets.token_urlsafe(24)
+    event_tickets[ticket] = (session_token, now + EVENTS_TICKET_SECONDS)
+    return ticket
+
+def redeem_event_ticket(ticket: str) -> Optional[Dict]:
+    """Consume el ticket; devuelve el usuario si sigue vigente y su sesión también."""
+    session_token, expires = event_tickets.pop(ticket, (None, 0.0))
+    if session_token is None or expires <= time.monotonic():
+        return None
+    return get_user_by_token(session_token)
+
+def _format_sse(event: Dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
 # ============================================================================
 # FUNCIONES DE PERSISTENCIA
 # ============================================================================
@@ -204,19 +733,20 @@ def get_user_by_token(token: str) -> Optional[Dict]:
 def _class_path(user_id: str, item_id: int) -> str:
     return os.path.join(DUMP_DIR, user_id, str(item_id))
 
-def persist_class_to_disk(user_id: str, item_id: int, data: Dict):
-    path = _class_path(user_id, item_id)
+def _write_class_files(path: str, item_id: int, data: Dict) -> Dict:
+    """Escribe meta.json y los parciales de una clase en `path`; devuelve el meta escrito."""
     os.makedirs(path, exist_ok=True)
+    meta = {
+        "item_id": item_id,
+        "name": data.get("name"),
+        "price": data.get("price", 0.0),
+        "is_offer": data.get("is_offer", False),
+        "partials": data.get("partials", []),
+        "owner": data.get("owner")
+    }
     meta_path = os.path.join(path, "meta.json")
     with open(meta_path, "w", encoding="utf-8") as f:
-        json.dump({
-            "item_id": item_id,
-            "name": data.get("name"),
-            "price": data.get("price", 0.0),
-            "is_offer": data.get("is_offer", False),
-            "partials": data.get("partials", []),
-            "owner": data.get("owner")
-        }, f, ensure_ascii=False, indent=2)
+        json.dump(meta, f, ensure_ascii=False, indent=2)
     # Además de meta.json, volcar cada parcial en archivos separados
     try:
         partials = data.get("partials", []) or []
@@ -261,16 +791,34 @@ def persist_class_to_disk(user_id: str, item_id: int, data: Dict):
     except Exception as e:
         # No queremos que un fallo en el volcado de parciales impida que la API funcione
         print(f"Advertencia: error guardando parciales en disco: {e}")
+    return meta
+
+def persist_class_to_disk(user_id: str, item_id: int, data: Dict):
+    meta = _write_class_files(_class_path(user_id, item_id), item_id, data)
+    # Se reemplaza (no se muta) para que un snapshot en curso conserve su versión
+    persisted_classes[(user_id, item_id)] = meta
+
+def _writable_product(item_id: int) -> ProductResponse:
+    """
+    Copy-on-write: las mutaciones trabajan sobre una copia de la clase para que
+    quien tenga una referencia previa (p. ej. una exportación en curso) siga
+    viendo un estado consistente.
+    """
+    product = products_db[item_id].model_copy(deep=True)
+    products_db[item_id] = product
+    return product
 
 def remove_class_from_disk(user_id: str, item_id: int):
     """Elimina una clase específica del disco."""
     path = _class_path(user_id, item_id)
     if os.path.isdir(path):
         shutil.rmtree(path)
+    persisted_classes.pop((user_id, item_id), None)
 
 def load_dumpdata_into_memory():
     """Carga clases y usuarios existentes al iniciar."""
     products_db.clear()
+    persisted_classes.clear()
     users_store.clear()
     email_index.clear()
     username_index.clear()
@@ -315,13 +863,173 @@ def load_dumpdata_into_memory():
                     with open(meta_path, "r", encoding="utf-8") as f:
                         data = json.load(f)
                     products_db[item_id] = ProductResponse(**data)
+                    persisted_classes[(user_id_dir, item_id)] = data
             except (ValueError, json.JSONDecodeError, KeyError) as e:
                 print(f"Error cargando clase {item_id_str}: {e}")
                 continue
 
+    rebuild_all_indexes()
+
 # Cargar al inicio
 load_dumpdata_into_memory()
 
+# ============================================================================
+# RESPALDOS: SNAPSHOT Y RESTAURACIÓN
+# ============================================================================
+
+SNAPSHOT_FORMAT = "gestion-calificaciones-snapshot"
+SNAPSHOT_VERSION = 1
+
+def capture_snapshot() -> Dict:
+    """
+    Captura un estado consistente sin detener escrituras: se ejecuta de una vez
+    en el event loop y, como cada escritura reemplaza la entrada de
+    `persisted_classes`, basta con guardar referencias. Las clases se toman por
+    (user_id, item_id), así que se respaldan las de todos los usuarios aunque
+    compartan item_id. Solo se copian los registros de usuario (pequeños).
+    """
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "users": [dict(u) for u in users_store.values()],
+        "classes": list(persisted_classes.items())
+    }
+
+def iter_snapshot_records(snapshot: Dict):
+    yield {"type": "header", "format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "created_at": snapshot["created_at"]}
+    for user in snapshot["users"]:
+        yield {"type": "user", "user": user}
+    for (user_id, _), data in snapshot["classes"]:
+        yield {"type": "class", "user_id": user_id, "class": data}
+
+def iter_snapshot_gzip(snapshot: Dict):
+    """Serializa el snapshot como NDJSON comprimido con gzip, en streaming."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for record in iter_snapshot_records(snapshot):
+        chunk = compressor.compress((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+def write_snapshot_to_disk(path: str) -> int:
+    snapshot = capture_snapshot()
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in iter_snapshot_gzip(snapshot):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+def parse_snapshot(data: bytes) -> List[Dict]:
+    records = [json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line.strip()]
+    header = records[0] if records else {}
+    if not isinstance(header, dict) or header.get("type") != "header" or header.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError("El archivo no es un snapshot válido")
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Versión de snapshot no soportada: {header.get('version')}")
+    return records[1:]
+
+# Errores esperables al leer un snapshot mal formado (se responden con 400)
+SNAPSHOT_ERRORS = (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError, ValidationError)
+
+def _check_user_id(user_id: Any) -> str:
+    # Se usa como nombre de carpeta dentro de DumpData: solo se aceptan UUID canónicos
+    if not isinstance(user_id, str) or str(uuid.UUID(user_id)) != user_id:
+        raise ValueError(f"user_id inválido: {user_id!r}")
+    return user_id
+
+def validate_snapshot(records: List[Dict]) -> Tuple[Dict[str, Dict], List[Tuple[str, ProductResponse]]]:
+    """Valida todos los registros antes de tocar disco o memoria."""
+    new_users: Dict[str, Dict] = {}
+    new_classes: List[Tuple[str, ProductResponse]] = []
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError("Registro de snapshot inválido")
+        if record.get("type") == "user":
+            user = record["user"]
+            if not isinstance(user, dict):
+                raise ValueError("Registro de usuario inválido")
+            user_id = _check_user_id(user["user_id"])
+            if not isinstance(user["email"], str) or not isinstance(user["username"], str):
+                raise ValueError(f"Usuario {user_id} sin email o username válidos")
+            new_users[user_id] = user
+        elif record.get("type") == "class":
+            data = record["class"]
+            if not isinstance(data, dict):
+                raise ValueError("Registro de clase inválido")
+            new_classes.append((_check_user_id(record["user_id"]), ProductResponse(**data)))
+        else:
+            raise ValueError(f"Tipo de registro desconocido: {record.get('type')!r}")
+    return new_users, new_classes
+
+def stage_restore(new_users: Dict[str, Dict], new_classes: List[Tuple[str, ProductResponse]]) -> str:
+    """Escribe el árbol restaurado en una carpeta temporal junto a DumpData y devuelve su ruta."""
+    staging = tempfile.mkdtemp(prefix=os.path.basename(DUMP_DIR) + ".restore-", dir=os.path.dirname(DUMP_DIR))
+    os.chmod(staging, 0o755)  # mkdtemp crea la carpeta como 0700
+    try:
+        for user_id, user in new_users.items():
+            user_dir = os.path.join(staging, user_id)
+            os.makedirs(user_dir, exist_ok=True)
+            with open(os.path.join(user_dir, "user_meta.json"), "w", encoding="utf-8") as f:
+                json.dump(user, f, ensure_ascii=False, indent=2)
+        for user_id, product in new_classes:
+            _write_class_files(os.path.join(staging, user_id, str(product.item_id)), product.item_id, product.model_dump())
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return staging
+
+def apply_restore(staging: str, new_users: Dict[str, Dict], new_classes: List[Tuple[str, ProductResponse]]) -> Tuple[Dict, Optional[str]]:
+    """
+    Intercambia DumpData por la carpeta preparada y después el estado en memoria.
+    No hace await: en el servidor ocurre de una vez, sin escrituras intercaladas.
+    Devuelve el resumen y la ruta del DumpData anterior, que queda por borrar
+    (puede tener muchos archivos, así que se borra fuera del event loop).
+    """
+    previous = staging + "-old"
+    if os.path.isdir(DUMP_DIR):
+        os.rename(DUMP_DIR, previous)
+    try:
+        os.rename(staging, DUMP_DIR)
+    except OSError:
+        if os.path.isdir(previous):
+            os.rename(previous, DUMP_DIR)
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    users_store.clear()
+    users_store.update(new_users)
+    email_index.clear()
+    email_index.update({u["email"].lower(): uid for uid, u in new_users.items()})
+    username_index.clear()
+    username_index.update({u["username"].lower(): uid for uid, u in new_users.items()})
+    products_db.clear()
+    persisted_classes.clear()
+    for user_id, product in new_classes:
+        products_db[product.item_id] = product
+        persisted_classes[(user_id, product.item_id)] = product.model_dump()
+    for token in [t for t, uid in sessions.items() if uid not in users_store]:
+        del sessions[token]
+    rebuild_all_indexes()
+
+    # Los clientes conectados al feed deben recargar todo
+    for owner, queues in event_subscribers.items():
+        for queue in queues:
+            _push_event(queue, {"id": _current_event_id(owner), "type": "resync"})
+
+    return {"users": len(new_users), "classes": len(new_classes)}, (previous if os.path.isdir(previous) else None)
+
+def restore_snapshot(records: List[Dict]) -> Dict:
+    """
+    Reemplaza el estado completo con el del snapshot (uso sin servidor, bloqueante):
+    valida todo, prepara el árbol aparte y lo intercambia con DumpData.
+    """
+    new_users, new_classes = validate_snapshot(records)
+    staging = stage_restore(new_users, new_classes)
+    result, previous = apply_restore(staging, new_users, new_classes)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+    return result
+
 # ============================================================================
 # ENDPOINTS: ITEMS (CLASES)
 # ============================================================================
@@ -378,6 +1086,8 @@ async def create_or_update_product(
     )
     products_db[item_id] = response
     persist_class_to_disk(user["user_id"], item_id, response.dict())
+    refresh_class_indexes(item_id)
+    publish_change(user["username"], "class_upserted", item_id, item=response.model_dump())
     return response
 
 @app.delete("/items/{item_id}")
@@ -391,6 +1101,8 @@ async def delete_product(item_id: int):
 
     # Eliminar y devolver confirmación
     deleted = products_db.pop(item_id)
+    drop_class_indexes(item_id)
+    publish_change(deleted.owner, "class_deleted", item_id)
     # Intentar eliminar en disco si existe la estructura (no crítico)
     try:
         # Si no hay owner/estructura en el registro, skip
@@ -432,6 +1144,7 @@ async def add_partial(
     product = products_db[item_id]
     if product.owner != user["username"]:
         raise HTTPException(status_code=403, detail="No tienes acceso a esta clase")
+    product = _writable_product(item_id)
     
     partial_name = partial.get("name")
     if not partial_name:
@@ -440,10 +1153,14 @@ async def add_partial(
     existing_idx = next((i for i, p in enumerate(product.partials) if p.get("name") == partial_name), None)
     if existing_idx is not None:
         product.partials[existing_idx].update(partial)
+        stored_partial = product.partials[existing_idx]
     else:
         product.partials.append(partial)
+        stored_partial = partial
     
     persist_class_to_disk(user["user_id"], item_id, product.dict())
+    refresh_class_indexes(item_id)
+    publish_change(user["username"], "partial_upserted", item_id, partial=stored_partial)
     return {"message": "Parcial guardado", "partial": partial}
 
 @app.delete("/items/{item_id}/partials/{partial_name}")
@@ -462,9 +1179,12 @@ async def delete_partial(
     product = products_db[item_id]
     if product.owner != user["username"]:
         raise HTTPException(status_code=403, detail="No tienes acceso a esta clase")
+    product = _writable_product(item_id)
     
     product.partials = [p for p in product.partials if p.get("name") != partial_name]
     persist_class_to_disk(user["user_id"], item_id, product.dict())
+    refresh_class_indexes(item_id)
+    publish_change(user["username"], "partial_deleted", item_id, partial_name=partial_name)
     return {"message": "Parcial eliminado"}
 
 # ============================================================================
@@ -488,6 +1208,7 @@ async def add_activity(
     product = products_db[item_id]
     if product.owner != user["username"]:
         raise HTTPException(status_code=403, detail="No tienes acceso a esta clase")
+    product = _writable_product(item_id)
     
     partial = next((p for p in product.partials if p.get("name") == partial_name), None)
     if not partial:
@@ -502,6 +1223,8 @@ async def add_activity(
     partial["activities"].append(activity_copy)
     
     persist_class_to_disk(user["user_id"], item_id, product.dict())
+    refresh_class_indexes(item_id)
+    publish_change(user["username"], "activity_added", item_id, partial_name=partial_name, activity=activity_copy)
     return {"id": activity_id, "activity": activity_copy}
 
 @app.delete("/items/{item_id}/partials/{partial_name}/activities/{activity_idx}")
@@ -521,6 +1244,7 @@ async def delete_activity(
     product = products_db[item_id]
     if product.owner != user["username"]:
         raise HTTPException(status_code=403, detail="No tienes acceso a esta clase")
+    product = _writable_product(item_id)
     
     partial = next((p for p in product.partials if p.get("name") == partial_name), None)
     if not partial:
@@ -531,8 +1255,218 @@ async def delete_activity(
     
     partial["activities"].pop(activity_idx)
     persist_class_to_disk(user["user_id"], item_id, product.dict())
+    refresh_class_indexes(item_id)
+    publish_change(user["username"], "activity_deleted", item_id, partial_name=partial_name, activity_idx=activity_idx)
     return {"message": "Actividad eliminada"}
 
+# ============================================================================
+# ENDPOINTS: ANALÍTICA
+# ============================================================================
+
+@app.get("/analytics/")
+async def get_user_analytics(authorization: Optional[str] = Header(None)):
+    """Estadísticas agregadas de todas las clases del usuario (desde rollups)."""
+    user = get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+
+    summary = get_user_rollup(user["username"])
+    classes = [
+        _class_rollup_response(class_rollups[item_id])
+        for item_id in sorted(owner_classes_index.get(user["username"], set()))
+    ]
+    return {**summary, "classes": classes}
+
+@app.get("/analytics/{item_id}")
+async def get_class_analytics(item_id: int, authorization: Optional[str] = Header(None)):
+    user = get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+
+    if item_id not in products_db:
+        raise HTTPException(status_code=404, detail="Clase no encontrada")
+
+    if products_db[item_id].owner != user["username"]:
+        raise HTTPException(status_code=403, detail="No tienes acceso a esta clase")
+
+    if item_id not in class_rollups:
+        refresh_class_rollup(item_id)
+    rollup = class_rollups.get(item_id)
+    if rollup is None:
+        raise HTTPException(status_code=500, detail="No se pudieron calcular las estadísticas de la clase")
+    return _class_rollup_response(rollup)
+
+# ============================================================================
+# ENDPOINTS: BÚSQUEDA
+# ============================================================================
+
+SEARCH_KIND_ORDER = {"class": 0, "partial": 1, "activity": 2}
+
+@app.get("/search/")
+async def search(
+    q: str = Query(..., min_length=1, description="Texto a buscar"),
+    limit: int = Query(50, ge=1, le=500),
+    authorization: Optional[str] = Header(None)
+):
+    """Busca clases, parciales y actividades del usuario por prefijo de palabra."""
+    user = get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+
+    matches = sorted(
+        search_owner(user["username"], q),
+        key=lambda e: (e[1], SEARCH_KIND_ORDER[e[0]], str(e[2] or ""), e[3] if e[3] is not None else -1)
+    )
+
+    results = []
+    classes: Dict[int, Dict] = {}
+    for kind, item_id, partial_name, activity_idx in matches[:limit]:
+        product = products_db[item_id]
+        result = {"type": kind, "item_id": item_id, "class": product.name}
+        if partial_name is not None:
+            result["partial"] = partial_name
+        if activity_idx is not None:
+            partial = next((p for p in product.partials if p.get("name") == partial_name), {})
+            activity = dict(_iter_activities(partial)).get(activity_idx, {})
+            result["activity_idx"] = activity_idx
+            result["activity"] = activity.get("name")
+        results.append(result)
+        if item_id not in classes:
+            # Resumen para pintar la tarjeta sin pedir /items/{item_id}
+            classes[item_id] = {
+                "item_id": item_id,
+                "name": product.name,
+                "owner": product.owner,
+                "partials": [{"name": p.get("name"), "vpf": p.get("vpf", 0)} for p in product.partials]
+            }
+
+    return {"query": q, "total": len(matches), "items": results, "classes": list(classes.values())}
+
+# ============================================================================
+# ENDPOINTS: EXPORTACIÓN
+# ============================================================================
+
+EXPORT_COLUMNS = ["item_id", "class", "partial", "activity", "category", "score", "weight"]
+
+def _iter_export_rows(snapshot: List[ProductResponse]):
+    """Genera una fila por actividad a partir de las clases capturadas."""
+    for product in snapshot:
+        for partial in product.partials or []:
+            for _, activity in _iter_activities(partial):
+                yield {
+                    "item_id": product.item_id,
+                    "class": product.name,
+                    "partial": partial.get("name"),
+                    "activity": activity.get("name"),
+                    "category": activity.get("category"),
+                    "score": activity.get("score"),
+                    "weight": activity.get("weight", 1)
+                }
+
+def _iter_csv(snapshot: List[ProductResponse]):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for row in _iter_export_rows(snapshot):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _iter_ndjson(snapshot: List[ProductResponse]):
+    for row in _iter_export_rows(snapshot):
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+@app.get("/export/")
+async def export_grades(
+    authorization: Optional[str] = Header(None),
+    format: str = Query("csv", pattern="^(csv|ndjson)$")
+):
+    """
+    Exporta las calificaciones del usuario en streaming (CSV o NDJSON).
+    Solo se capturan referencias a las clases actuales: como las mutaciones
+    hacen copy-on-write, la exportación refleja un estado consistente sin
+    copiar toda la cuenta en memoria.
+    """
+    user = get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+
+    snapshot = sorted(
+        (p for p in products_db.values() if p.owner == user["username"]),
+        key=lambda p: p.item_id
+    )
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _iter_ndjson(snapshot),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="calificaciones.ndjson"'}
+        )
+    return StreamingResponse(
+        _iter_csv(snapshot),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="calificaciones.csv"'}
+    )
+
+# ============================================================================
+# ENDPOINTS: FEED DE CAMBIOS
+# ============================================================================
+
+async def _event_stream(request: Request, owner: str, queue: asyncio.Queue, backlog: List[Dict]):
+    try:
+        yield "retry: 3000\n\n"
+        for event in backlog:
+            yield _format_sse(event)
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield _format_sse(event)
+    finally:
+        event_subscribers.get(owner, set()).discard(queue)
+
+@app.post("/events/ticket")
+async def create_event_ticket(authorization: Optional[str] = Header(None)):
+    """Ticket de un solo uso para abrir /events/ desde EventSource."""
+    user = get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+    session_token = authorization[7:] if authorization.startswith("Bearer ") else authorization
+    return {"ticket": issue_event_ticket(session_token), "expires_in": EVENTS_TICKET_SECONDS}
+
+@app.get("/events/")
+async def change_feed(
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    ticket: Optional[str] = Query(None, description="Ticket de POST /events/ticket (EventSource no admite cabeceras)"),
+    last_event_id: Optional[str] = Header(None),
+    last_event_id_query: Optional[str] = Query(None, alias="last_event_id", description="Último evento recibido al reconectar con un ticket nuevo")
+):
+    """
+    Feed SSE con los cambios de las clases del usuario (clase, parcial o actividad
+    agregados/eliminados) para que el cliente aplique deltas en vez de recargar /items/.
+    """
+    user = redeem_event_ticket(ticket) if ticket else get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+    last_event_id = last_event_id if last_event_id is not None else last_event_id_query
+
+    owner = user["username"]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+    event_subscribers.setdefault(owner, set()).add(queue)
+    backlog = events_since(owner, last_event_id) if last_event_id is not None else []
+
+    return StreamingResponse(
+        _event_stream(request, owner, queue, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============================================================================
 # ENDPOINTS: AUTENTICACIÓN
 # ============================================================================
@@ -620,6 +1554,7 @@ async def delete_account(authorization: Optional[str] = Header(None)):
             except Exception as e:
                 print(f"Advertencia al eliminar clase {item_id}: {e}")
             del products_db[item_id]
+            drop_class_indexes(item_id)
     
     # Eliminar carpeta del usuario completamente con manejo robusto
     user_dir = os.path.join(DUMP_DIR, user_id)
@@ -668,6 +1603,8 @@ async def delete_account(authorization: Optional[str] = Header(None)):
             # Continúa aunque falle la eliminación de carpeta
     
     # Eliminar de índices
+    for key in [k for k in persisted_classes if k[0] == user_id]:
+        del persisted_classes[key]
     if user_id in users_store:
         del users_store[user_id]
     if email in email_index:
@@ -677,6 +1614,92 @@ async def delete_account(authorization: Optional[str] = Header(None)):
     
     return {"message": "Cuenta eliminada"}
 
+# ============================================================================
+# ENDPOINTS: ADMINISTRACIÓN (RESPALDOS)
+# ============================================================================
+
+def _require_admin(authorization: Optional[str]) -> Dict:
+    user = get_user_by_token(authorization)
+    if not user:
+        raise HTTPException(status_code=401, detail="No autorizado")
+    if not user.get("is_admin"):
+        raise HTTPException(status_code=403, detail="Se requieren permisos de administrador")
+    return user
+
+@app.get("/admin/snapshot")
+async def download_snapshot(authorization: Optional[str] = Header(None)):
+    """Descarga un snapshot consistente (NDJSON + gzip) sin detener las escrituras."""
+    _require_admin(authorization)
+    snapshot = capture_snapshot()
+    filename = f"snapshot-{snapshot['created_at'][:19].replace(':', '')}.ndjson.gz"
+    return StreamingResponse(
+        iter_snapshot_gzip(snapshot),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/admin/restore")
+async def upload_snapshot(request: Request, authorization: Optional[str] = Header(None)):
+    """Restaura un snapshot enviado como cuerpo de la petición (application/gzip)."""
+    _require_admin(authorization)
+    body = await request.body()
+    # Descomprimir, validar y escribir la carpeta temporal ocurre en un hilo para no
+    # bloquear el event loop; solo el intercambio final se hace aquí.
+    try:
+        new_users, new_classes = await asyncio.to_thread(lambda: validate_snapshot(parse_snapshot(body)))
+    except SNAPSHOT_ERRORS as e:
+        raise HTTPException(status_code=400, detail=f"Snapshot inválido: {e}")
+    staging = await asyncio.to_thread(stage_restore, new_users, new_classes)
+    result, previous = apply_restore(staging, new_users, new_classes)
+    if previous:
+        await asyncio.to_thread(shutil.rmtree, previous, True)
+    return {"message": "Snapshot restaurado", **result}
+
+# ============================================================================
+# ENDPOINTS: FRONTEND (MODO PRODUCCIÓN)
+# ============================================================================
+
+if SERVE_FRONTEND:
+    from build_frontend import build_frontend, frontend_is_stale, DIST_DIR, MANIFEST_NAME
+
+    # Regenerar si falta dist o si algún archivo del frontend cambió desde el último build
+    if frontend_is_stale():
+        print("Generando frontend/dist (falta o está desactualizado)...")
+        build_frontend()
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        fingerprinted_assets = set(json.load(f).values())
+
+    @app.get("/app/")
+    @app.get("/app/{path:path}")
+    async def serve_frontend(request: Request, path: str = "index.html"):
+        """Sirve frontend/dist eligiendo la variante .br/.gz precomprimida si el cliente la acepta."""
+        rel_path = path or "index.html"
+        full_path = os.path.normpath(os.path.join(DIST_DIR, rel_path))
+        if (
+            not full_path.startswith(DIST_DIR + os.sep)
+            or not os.path.isfile(full_path)
+            or full_path.endswith((".gz", ".br"))
+            or rel_path == MANIFEST_NAME
+        ):
+            raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+        headers = {"Vary": "Accept-Encoding"}
+        if rel_path in fingerprinted_assets:
+            headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            headers["Cache-Control"] = "no-cache"
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        file_path = full_path
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if _encoding_allowed(accepted, encoding) and os.path.isfile(full_path + suffix):
+                file_path = full_path + suffix
+                headers["Content-Encoding"] = encoding
+                break
+
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        return FileResponse(file_path, media_type=media_type, headers=headers)
+
 # ============================================================================
 # PUNTO DE ENTRADA
 # ============================================================================
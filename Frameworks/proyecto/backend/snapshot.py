@@ -0,0 +1,61 @@
+"""
+Respaldo y restauración de DumpData como un único archivo .ndjson.gz.
+
+Con el servidor en ejecución (snapshot consistente sin detener escrituras):
+    python snapshot.py create respaldo.ndjson.gz --url http://127.0.0.1:8000 --token TOKEN_ADMIN
+    python snapshot.py restore respaldo.ndjson.gz --url http://127.0.0.1:8000 --token TOKEN_ADMIN
+
+Sin servidor (lee/escribe DumpData directamente):
+    python snapshot.py create respaldo.ndjson.gz
+    python snapshot.py restore respaldo.ndjson.gz
+"""
+import argparse
+import json
+import shutil
+import urllib.request
+import urllib.error
+
+def _request(url: str, token: str, method: str = "GET", data: bytes = None, content_type: str = None):
+    req = urllib.request.Request(url, data=data, method=method)
+    req.add_header("Authorization", f"Bearer {token}")
+    if content_type:
+        req.add_header("Content-Type", content_type)
+    return urllib.request.urlopen(req, timeout=300)
+
+def create(path: str, url: str = None, token: str = None):
+    if url:
+        with _request(f"{url.rstrip('/')}/admin/snapshot", token) as resp, open(path, "wb") as f:
+            shutil.copyfileobj(resp, f)
+    else:
+        import main
+        main.write_snapshot_to_disk(path)
+    print(f"Snapshot guardado en {path}")
+
+def restore(path: str, url: str = None, token: str = None):
+    with open(path, "rb") as f:
+        data = f.read()
+    if url:
+        with _request(f"{url.rstrip('/')}/admin/restore", token, "POST", data, "application/gzip") as resp:
+            result = json.load(resp)
+    else:
+        import main
+        result = main.restore_snapshot(main.parse_snapshot(data))
+    print(f"Restaurado: {result.get('users')} usuarios, {result.get('classes')} clases")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Respaldo y restauración de DumpData")
+    parser.add_argument("action", choices=["create", "restore"])
+    parser.add_argument("path", help="Archivo .ndjson.gz")
+    parser.add_argument("--url", help="URL del servidor en ejecución (usa los endpoints /admin)")
+    parser.add_argument("--token", help="Token de un usuario administrador")
+    args = parser.parse_args()
+
+    if args.url and not args.token:
+        parser.error("--token es obligatorio junto con --url")
+    try:
+        if args.action == "create":
+            create(args.path, args.url, args.token)
+        else:
+            restore(args.path, args.url, args.token)
+    except urllib.error.HTTPError as e:
+        raise SystemExit(f"Error del servidor ({e.code}): {e.read().decode('utf-8', 'replace')}")
@@ -0,0 +1,130 @@
+// events.js - Feed de cambios (SSE) para aplicar deltas sin recargar /items/
+let changeFeed = null;
+let changeFeedGeneration = 0; // invalida conexiones pendientes al desconectar
+let changeFeedRetry = null;
+let lastChangeEventId = null;
+let showingAllProducts = false; // true cuando la vista de resultados es "Mis clases"
+
+// EventSource no envía cabeceras: se pide un ticket de un solo uso con el token
+// de sesión en Authorization y solo el ticket viaja en la URL
+async function connectChangeFeed() {
+    if (changeFeed || !authToken || typeof EventSource === 'undefined') return;
+    const generation = ++changeFeedGeneration;
+    let ticket;
+    try {
+        const res = await fetch(`${API_BASE_URL}/events/ticket`, { method: 'POST', headers: getAuthHeader() });
+        if (!res.ok) return;
+        ticket = (await res.json()).ticket;
+    } catch (err) {
+        scheduleChangeFeedReconnect(generation);
+        return;
+    }
+    if (generation !== changeFeedGeneration || changeFeed) return;
+
+    let url = `${API_BASE_URL}/events/?ticket=${encodeURIComponent(ticket)}`;
+    if (lastChangeEventId) url += `&last_event_id=${encodeURIComponent(lastChangeEventId)}`;
+    changeFeed = new EventSource(url);
+
+    ['class_upserted', 'class_deleted', 'partial_upserted', 'partial_deleted', 'activity_added', 'activity_deleted']
+        .forEach(type => changeFeed.addEventListener(type, (e) => {
+            lastChangeEventId = e.lastEventId || lastChangeEventId;
+            try {
+                applyChangeEvent(JSON.parse(e.data));
+            } catch (err) {
+                console.warn('Evento de cambios inválido:', err);
+            }
+        }));
+
+    // El servidor pide resincronizar cuando el cliente se quedó atrás
+    changeFeed.addEventListener('resync', (e) => {
+        lastChangeEventId = e.lastEventId || lastChangeEventId;
+        loadAllProducts();
+    });
+
+    // El ticket ya se consumió: en vez de dejar que EventSource reintente con la
+    // misma URL, se cierra y se reconecta con un ticket nuevo
+    changeFeed.onerror = () => {
+        if (generation !== changeFeedGeneration) return;
+        changeFeed.close();
+        changeFeed = null;
+        scheduleChangeFeedReconnect(generation);
+    };
+}
+
+function scheduleChangeFeedReconnect(generation) {
+    clearTimeout(changeFeedRetry);
+    changeFeedRetry = setTimeout(() => {
+        if (generation === changeFeedGeneration) connectChangeFeed();
+    }, 3000);
+}
+
+function disconnectChangeFeed() {
+    changeFeedGeneration++;
+    clearTimeout(changeFeedRetry);
+    lastChangeEventId = null;
+    if (changeFeed) {
+        changeFeed.close();
+        changeFeed = null;
+    }
+}
+
+function isChangeFeedOpen() {
+    return !!changeFeed && changeFeed.readyState === EventSource.OPEN;
+}
+
+function applyChangeEvent(event) {
+    const itemId = event.item_id;
+    const product = products_db[itemId];
+
+    if (event.type === 'class_upserted') {
+        products_db[itemId] = event.item;
+    } else if (event.type === 'class_deleted') {
+        delete products_db[itemId];
+    } else if (product) {
+        const partials = product.partials || (product.partials = []);
+        const partial = partials.find(p => p.name === (event.partial_name || (event.partial && event.partial.name)));
+        if (event.type === 'partial_upserted') {
+            if (partial) Object.assign(partial, event.partial);
+            else partials.push(event.partial);
+        } else if (event.type === 'partial_deleted') {
+            product.partials = partials.filter(p => p.name !== event.partial_name);
+        } else if (partial && event.type === 'activity_added') {
+            (partial.activities || (partial.activities = [])).push(event.activity);
+        } else if (partial && event.type === 'activity_deleted') {
+            (partial.activities || []).splice(event.activity_idx, 1);
+        }
+    } else {
+        return;
+    }
+
+    if (products_db[itemId]) products_db[itemId].version = event.version;
+    renderLocalProducts();
+
+    // Mantener sincronizados los parciales de la clase en edición (si el modal no está abierto)
+    const editingId = String(document.getElementById('itemId')?.value || '').trim();
+    const modalOpen = partialModal && !partialModal.classList.contains('hidden');
+    if (editingId === String(itemId) && products_db[itemId] && !modalOpen) {
+        currentPartials = JSON.parse(JSON.stringify(products_db[itemId].partials || []));
+        renderPartials();
+    }
+}
+
+function renderLocalProducts() {
+    if (!showingAllProducts || !resultsContainer) return;
+    const items = Object.values(products_db);
+    if (items.length === 0) {
+        resultsContainer.innerHTML = '<p class="placeholder">No tienes clases aún</p>';
+        return;
+    }
+    displayProducts(items, `Mis clases (${items.length})`);
+}
+
+// Tras una mutación propia: si el feed está activo el cambio llega como delta
+function refreshProductsView() {
+    if (isChangeFeedOpen() && Object.keys(products_db).length > 0) {
+        showingAllProducts = true;
+        renderLocalProducts();
+    } else {
+        loadAllProducts();
+    }
+}
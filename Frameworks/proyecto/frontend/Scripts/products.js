@@ -63,7 +63,7 @@ async function handleProductSubmit(e) {
         }
         
         showNotification('✅ Clase guardada', 'success');
-        loadAllProducts();
+        refreshProductsView();
     } catch (e) {
         showNotification(`❌ Error: ${e.message}`, 'error');
     }
@@ -72,13 +72,17 @@ async function handleProductSubmit(e) {
 async function searchProduct() {
     const itemId = String(document.getElementById('searchId')?.value || '').trim();
     if (!itemId) {
-        showNotification('⚠️ Ingresa un ID', 'warning');
+        showNotification('⚠️ Ingresa un ID o nombre', 'warning');
         return;
     }
     if (!authToken) {
         showNotification('🔒 Inicia sesión', 'warning');
         return;
     }
+    if (!/^\d+$/.test(itemId)) {
+        await searchProductsByName(itemId);
+        return;
+    }
     try {
         const res = await fetch(`${API_BASE_URL}/items/${encodeURIComponent(itemId)}`, {
             headers: getAuthHeader()
@@ -89,12 +93,38 @@ async function searchProduct() {
             return;
         }
         const prod = await res.json();
+        showingAllProducts = false;
         displayProducts([prod], `Clase ID: ${itemId}`);
     } catch (e) {
         showNotification(`❌ Error: ${e.message}`, 'error');
     }
 }
 
+// Búsqueda por nombre de clase, parcial o actividad (índice del servidor)
+async function searchProductsByName(query) {
+    try {
+        const res = await fetch(`${API_BASE_URL}/search/?q=${encodeURIComponent(query)}`, {
+            headers: getAuthHeader()
+        });
+        if (!res.ok) {
+            const err = await res.json().catch(()=>({ detail: 'Error en la búsqueda' }));
+            showNotification(`❌ ${err.detail || 'Error en la búsqueda'}`, 'error');
+            return;
+        }
+        const data = await res.json();
+        // El servidor devuelve el resumen de cada clase encontrada (sin pedir /items/{id})
+        const products = data.classes || [];
+        if (products.length === 0) {
+            showNotification('⚠️ Sin coincidencias', 'warning');
+            return;
+        }
+        showingAllProducts = false;
+        displayProducts(products, `Resultados para "${query}"`);
+    } catch (e) {
+        showNotification(`❌ Error: ${e.message}`, 'error');
+    }
+}
+
 async function loadAllProducts() {
     if (!authToken) {
         if (resultsContainer) resultsContainer.innerHTML = '<p class="placeholder">Inicia sesión para ver tus clases</p>';
@@ -109,6 +139,9 @@ async function loadAllProducts() {
             return;
         }
         const data = await res.json();
+        products_db = {};
+        (data && Array.isArray(data.items) ? data.items : []).forEach(item => { products_db[item.item_id] = item; });
+        showingAllProducts = true;
         if (!data || !Array.isArray(data.items) || data.items.length === 0) {
             if (resultsContainer) resultsContainer.innerHTML = '<p class="placeholder">No tienes clases aún</p>';
             return;
@@ -235,6 +268,13 @@ function editProduct(itemId) {
 async function loadEditingPartials(itemId) {
     if (!authToken) return;
     
+    // Con el feed de cambios activo la copia local ya está al día
+    if (isChangeFeedOpen() && products_db[itemId]) {
+        currentPartials = JSON.parse(JSON.stringify(products_db[itemId].partials || []));
+        renderPartials();
+        return;
+    }
+    
     try {
         const res = await fetch(`${API_BASE_URL}/items/${encodeURIComponent(itemId)}`, { 
             headers: getAuthHeader() 
@@ -328,7 +368,7 @@ async function confirmDelete() {
         showNotification('✅ Clase eliminada', 'success');
         currentProductToDelete = null;
         closeModal();
-        loadAllProducts();
+        refreshProductsView();
     } catch (e) {
         console.error('Error en confirmDelete:', e);
         // Error de red comúnmente -> backend no disponible
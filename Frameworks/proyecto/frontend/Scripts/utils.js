@@ -1,5 +1,6 @@
 // utils.js - Funciones de utilidad y configuración
-const API_BASE_URL = 'http://127.0.0.1:8000';
+// En modo producción el HTML define window.API_BASE_URL (mismo origen)
+const API_BASE_URL = window.API_BASE_URL || 'http://127.0.0.1:8000';
 const THEME_KEY = 'site-theme';
 
 function applyTheme(theme) {
@@ -77,6 +78,7 @@ function updateUIForAuth() {
     const accountMenuHeader = document.getElementById('accountMenuHeader');
 
     if (currentUser && authToken) {
+        if (typeof connectChangeFeed === 'function') connectChangeFeed();
         if (accountCard) accountCard.classList.add('hidden');
         if (classCard) classCard.classList.remove('hidden');
         if (searchCard) searchCard.classList.remove('hidden');
@@ -84,6 +86,7 @@ function updateUIForAuth() {
         if (accountMenuBtn) accountMenuBtn.style.display = 'block';
         if (accountMenuHeader) accountMenuHeader.textContent = `👤 ${currentUser.username}`;
     } else {
+        if (typeof disconnectChangeFeed === 'function') disconnectChangeFeed();
         if (accountCard) accountCard.classList.remove('hidden');
         if (classCard) classCard.classList.add('hidden');
         if (searchCard) searchCard.classList.add('hidden');